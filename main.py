@@ -34,7 +34,7 @@ if __name__ == "__main__":
     parser_corenlp.add_argument("--input-dir", help="Input directory", dest="input_dir", type=str, required=True)
     parser_corenlp.add_argument("--output-dir", help="Output directory", dest="output_dir", type=str, required=True)
     parser_corenlp.add_argument("--url", help="corenlp URL", dest="url", type=str, required=True)
-    parser_corenlp.add_argument("-n", "--n-jobs", help="Number of processes", dest="n_jobs", type=int, default=10,
+    parser_corenlp.add_argument("-n", "--n-jobs", help="Number of threads", dest="n_jobs", type=int, default=10,
                                 required=True)
 
     # BUILD ONE W2V MODEL
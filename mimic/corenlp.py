@@ -1,12 +1,11 @@
 import json
 import logging
 import os
-import re
 
 import requests
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
 
-from .tools import remove_abs, ensure_dir
+from .tools import ensure_dir, chunk_list, walk_files
 
 PARAMS = {"annotators": "tokenize,ssplit", "outputFormat": "json"}
 
@@ -17,7 +16,7 @@ def segment_and_tokenize(corpus_path, output_path, corenlp_url, n_jobs=10):
     :param corpus_path: input corpus path (.txt files)
     :param output_path: path where tokenized versions will be stored
     :param corenlp_url: CoreNLP server URL
-    :param n_jobs: number of processes to use
+    :param n_jobs: number of threads to use
     :return: nothing
     """
 
@@ -25,28 +24,33 @@ def segment_and_tokenize(corpus_path, output_path, corenlp_url, n_jobs=10):
 
     logging.info("Gathering file list")
 
-    for root, dirs, files in os.walk(os.path.abspath(corpus_path)):
-        for filename in files:
+    output_abs = os.path.abspath(output_path)
+    created_dirs = set()
 
-            # Source file path
-            source_file = os.path.join(root, filename)
+    for source_file, subdir, filename in walk_files(os.path.abspath(corpus_path)):
 
-            # Source file subdirectory path
-            subdir = remove_abs(re.sub(os.path.abspath(corpus_path), "", root))
-
-            # Target
-            target_dir = os.path.join(os.path.abspath(output_path), subdir)
-            target_file = os.path.join(target_dir, filename)
+        # Target
+        target_dir = os.path.join(output_abs, subdir)
+        target_file = os.path.join(target_dir, filename)
 
+        if target_dir not in created_dirs:
             ensure_dir(target_dir)
+            created_dirs.add(target_dir)
+
+        processing_list.append((source_file, target_file))
 
-            processing_list.append((source_file, target_file))
+    # Resolving joblib's negative n_jobs convention (-1: all CPUs) before sizing the batches
+    nb_jobs = effective_n_jobs(n_jobs)
 
     logging.info("* Number of files: {}".format(len(processing_list)))
-    logging.info("Starting processing with {} jobs".format(n_jobs))
+    logging.info("Starting processing with {} jobs".format(nb_jobs))
 
-    dismissed = Parallel(n_jobs=n_jobs)(delayed(_process_file)(source_file, target_file, corenlp_url)
-                                        for source_file, target_file in processing_list)
+    # Workers mostly wait on the CoreNLP server, threads avoid spawning processes and pickling arguments
+    # Files are dispatched in batches so that each batch reuses one HTTP connection
+    dismissed = Parallel(n_jobs=nb_jobs, backend="threading")(
+        delayed(_process_files)(file_batch, corenlp_url)
+        for file_batch in chunk_list(processing_list, nb_jobs * 4)
+    )
 
     logging.info("Dismissed: {:,} chunks, {:,} characters".format(
         sum([item[0] for item in dismissed]),
@@ -54,12 +58,33 @@ def segment_and_tokenize(corpus_path, output_path, corenlp_url, n_jobs=10):
     ))
 
 
-def _process_file(source_file, target_file, corenlp_url):
+def _process_files(file_batch, corenlp_url):
+    """
+    Process a batch of files with CoreNLP using a single HTTP session
+    :param file_batch: list of (source file path, target file path) tuples
+    :param corenlp_url: CoreNLP server URL
+    :return: dismissed chunks for the whole batch
+    """
+
+    dismissed = [0, 0]
+
+    with requests.Session() as session:
+        for source_file, target_file in file_batch:
+            file_dismissed = _process_file(source_file, target_file, corenlp_url, session=session)
+
+            dismissed[0] += file_dismissed[0]
+            dismissed[1] += file_dismissed[1]
+
+    return dismissed
+
+
+def _process_file(source_file, target_file, corenlp_url, session=None):
     """
     Process one file with CoreNLP. Files are chunked into pieces of roughly 20,000 characters.
     :param source_file: source file path
     :param target_file: target file path
     :param corenlp_url: CoreNLP server URL
+    :param session: optional requests session to reuse
     :return: dismissed chunks
     """
 
@@ -67,16 +92,14 @@ def _process_file(source_file, target_file, corenlp_url):
 
     content = open(source_file, "r", encoding="UTF-8").read()
 
-    with open(target_file, "w", encoding="UTF-8") as output_file:
-        payload = get_response(content, corenlp_url)
+    with open(target_file, "wb") as output_file:
+        payload = get_response(content, corenlp_url, session=session)
         if payload:
-            for sentence in payload["sentences"]:
-                current_sentence = list()
-
-                for token in sentence["tokens"]:
-                    current_sentence.append(token["originalText"])
+            sentences = ["{}\n".format(" ".join([token["originalText"] for token in sentence["tokens"]]))
+                         for sentence in payload["sentences"]]
 
-                output_file.write("{}\n".format(" ".join(current_sentence)))
+            # Writing the whole document at once, encoded in one call
+            output_file.write("".join(sentences).encode("UTF-8"))
 
         else:
             dismissed[0] += 1
@@ -85,17 +108,21 @@ def _process_file(source_file, target_file, corenlp_url):
     return dismissed
 
 
-def get_response(txt, corenlp_url):
+def get_response(txt, corenlp_url, session=None):
     """
     Submit text to be tokenized to the CoreNLP server
     :param txt: txt to be tokenized
     :param corenlp_url: CoreNLP server URL
+    :param session: optional requests session to reuse
     :return: None or json response
     """
 
+    if session is None:
+        session = requests
+
     try:
         # Sending chunk to the server to be processed
-        r = requests.post(corenlp_url, params=PARAMS, data=txt.encode("UTF-8"))
+        r = session.post(corenlp_url, params=PARAMS, data=txt.encode("UTF-8"))
     except Exception as e:
         print("Exception while sending request: \"{}\"".format(e))
         return None
@@ -1,4 +1,5 @@
 import os
+from itertools import islice
 
 
 def ensure_dir(directory):
@@ -12,12 +13,28 @@ def ensure_dir(directory):
             raise
 
 
-def remove_abs(path):
+def walk_files(directory, subdir=""):
 
-    if os.path.isabs(path):
-        return path.lstrip("/")
-    else:
-        return path
+    # Yields (file path, subdirectory relative to the walk root, filename) using cached scandir entries.
+    # Mirrors os.walk: unreadable directories are skipped, symlinked directories are not descended into
+    # and every non-directory entry (including dangling symlinks) is listed as a file.
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return
+
+    with entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                if not entry.is_symlink():
+                    yield from walk_files(entry.path, os.path.join(subdir, entry.name))
+            else:
+                yield entry.path, subdir, entry.name
 
 
 def get_other_extension(filename, target_extension):
@@ -25,3 +42,17 @@ def get_other_extension(filename, target_extension):
     basename, extension = os.path.splitext(filename)
 
     return "{0}.{1}".format(basename, target_extension)
+
+
+def chunk_list(the_list, n):
+
+    # Checked eagerly so that a bad value fails at call time rather than silently producing no chunks
+    if n < 1:
+        raise ValueError("The number of chunks must be a positive integer (got {})".format(n))
+
+    # Lazily yields at most n contiguous chunks whose sizes differ by at most one
+    chunk_size, remainder = divmod(len(the_list), n)
+    iterator = iter(the_list)
+
+    return (list(islice(iterator, chunk_size + (1 if i < remainder else 0)))
+            for i in range(min(n, len(the_list))))
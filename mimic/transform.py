@@ -3,7 +3,9 @@ import os
 import random
 import re
 
-from .tools import ensure_dir, remove_abs
+from .tools import ensure_dir, walk_files
+
+PLACEHOLDER_REGEX = re.compile("\[\*\*[^\[]*\*\*\]")
 
 
 class PlaceholderMapper:
@@ -15,6 +17,10 @@ class PlaceholderMapper:
 
     def get_mapping(self, placeholder):
 
+        # Placeholders already mapped are returned without going through the regex cascade
+        if placeholder in self.placeholder_mapping:
+            return self.placeholder_mapping[placeholder]
+
         mo = re.match("\[\*\*Age over 90 \d+\*\*\]", placeholder)
         if mo:
             if mo.group(0) not in self.placeholder_mapping:
@@ -812,7 +818,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
 
-            if re.match("^$", line):
+            if line == "\n":
                 continue
 
             list_sub["addresses"].append(line.rstrip())
@@ -863,7 +869,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "generatedata.com", "phone_numbers_random.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["phone_numbers"].append(line.rstrip())
 
@@ -875,7 +881,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "generatedata.com", "companies_random.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["companies"].append(line.rstrip())
 
@@ -887,7 +893,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "www.countries-list.info", "countries.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["countries"].append(line.rstrip())
 
@@ -899,7 +905,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "generatedata.com", "emails_random.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["emails"].append(line.rstrip())
 
@@ -912,7 +918,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
               "r", encoding="UTF-8") as input_file:
         temp_set = set()
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             temp_set.add(line.rstrip())
         list_sub["holidays"] = list(temp_set)
@@ -925,7 +931,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "data.medicare.gov", "hospitals.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["hospitals"].append(line.rstrip())
 
@@ -937,7 +943,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "generatedata.com", "locations_random.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["locations"].append(line.rstrip())
 
@@ -949,7 +955,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "generatedata.com", "social_security_numbers_random.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["ssn"].append(line.rstrip())
 
@@ -961,7 +967,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "misc", "US_states.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["states"].append(line.rstrip())
 
@@ -973,7 +979,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "talk.collegeconfidential.com", "colleges.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["colleges"].append(line.rstrip())
 
@@ -985,7 +991,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "misc", "hospital_wards_units.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["wards_units"].append(line.rstrip())
 
@@ -997,7 +1003,7 @@ def replace_placeholders(corpus_path, output_path, list_path):
     with open(os.path.join(os.path.abspath(list_path), "generatedata.com", "websites_random.lst"),
               "r", encoding="UTF-8") as input_file:
         for line in input_file:
-            if re.match("^$", line):
+            if line == "\n":
                 continue
             list_sub["websites"].append(line.rstrip())
 
@@ -1016,55 +1022,44 @@ def replace_placeholders(corpus_path, output_path, list_path):
     logging.info("Creating mapper")
     mapper = PlaceholderMapper(list_sub)
 
-    logging.info("Computing number of files to process")
-
-    nb_files = 0
+    logging.info("Gathering file list")
 
-    for root, dirs, files in os.walk(os.path.abspath(corpus_path)):
-        for filename in files:
-            if re.match("^.*\.txt$", filename):
-                nb_files += 1
+    output_abs = os.path.abspath(output_path)
+    processing_list = list()
 
-    processed = 0
-
-    logging.info("Replacing placeholders. This can take a long time...")
+    for source_file, subdir, filename in walk_files(os.path.abspath(corpus_path)):
+        if filename.endswith(".txt"):
 
-    for root, dirs, files in os.walk(os.path.abspath(corpus_path)):
-        for filename in files:
-            if re.match(".*\.txt", filename):
+            target_path = os.path.join(output_abs, subdir)
+            target_file = os.path.join(target_path, filename)
 
-                source_file = os.path.join(root, filename)
-                subdir = remove_abs(re.sub(os.path.abspath(corpus_path), "", root))
+            processing_list.append((source_file, target_path, target_file))
 
-                target_path = os.path.join(os.path.abspath(output_path), subdir)
-                target_file = os.path.join(target_path, filename)
-
-                ensure_dir(target_path)
-
-                content = open(source_file, "r", encoding="UTF-8").read()
-                content_modified = ''
-
-                start = 0
+    nb_files = len(processing_list)
+    processed = 0
+    created_dirs = set()
 
-                for mo in re.finditer("\[\*\*[^\[]*\*\*\]", content):
+    logging.info("* Number of files: {}".format(nb_files))
+    logging.info("Replacing placeholders. This can take a long time...")
 
-                    replacement = mapper.get_mapping(mo.group(0))
+    for source_file, target_path, target_file in processing_list:
 
-                    content_modified += content[start: mo.start()]
-                    content_modified += replacement
+        if target_path not in created_dirs:
+            ensure_dir(target_path)
+            created_dirs.add(target_path)
 
-                    start = mo.end()
+        content = open(source_file, "r", encoding="UTF-8").read()
 
-                if start < len(content):
-                    content_modified += content[start: len(content)]
+        # Single substitution pass over the whole document
+        content_modified = PLACEHOLDER_REGEX.sub(lambda mo: mapper.get_mapping(mo.group(0)), content)
 
-                with open(target_file, "w", encoding="UTF-8") as output_file:
-                    output_file.write(content_modified)
+        with open(target_file, "wb") as output_file:
+            output_file.write(content_modified.encode("UTF-8"))
 
-                processed += 1
-                if processed % 1000 == 0 or processed == nb_files:
-                    logging.info("Processed: {}/{} ({}%)".format(
-                        processed, nb_files, round(float(processed/nb_files) * 100, 2)
-                    ))
+        processed += 1
+        if processed % 1000 == 0 or processed == nb_files:
+            logging.info("Processed: {}/{} ({}%)".format(
+                processed, nb_files, round(float(processed/nb_files) * 100, 2)
+            ))
 
     logging.info("Done !")
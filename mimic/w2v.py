@@ -1,9 +1,10 @@
 import os
 import random
-import re
 
 import gensim
 
+from .tools import walk_files
+
 
 class FilesIterator:
 
@@ -12,25 +13,24 @@ class FilesIterator:
         self.input_directory = input_directory
         self.file_list = list()
 
-        for root, dirs, files in os.walk(os.path.abspath(input_directory)):
-            for filename in files:
-                source_file = os.path.join(root, filename)
-                self.file_list.append(source_file)
+        for source_file, _, _ in walk_files(os.path.abspath(input_directory)):
+            self.file_list.append(source_file)
 
     def __iter__(self):
 
         random.shuffle(self.file_list)
 
         for filename in self.file_list:
-            with open(os.path.abspath(filename), "r", encoding="UTF-8") as input_file:
+            with open(os.path.abspath(filename), "r", encoding="UTF-8", buffering=1 << 20) as input_file:
                 all_lines = list(input_file)
                 random.shuffle(all_lines)
 
                 for line in all_lines:
-                    if re.match("^$", line):
+                    stripped = line.rstrip("\n")
+                    if not stripped:
                         continue
 
-                    yield line.rstrip("\n").split(" ")
+                    yield stripped.split(" ")
 
 
 def build_model(input_directory, target_dir, model_prefix, size=100, window=5, min_count=5, sg=0, n_jobs=1,
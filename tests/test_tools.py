@@ -0,0 +1,34 @@
+import unittest
+
+from mimic.tools import chunk_list
+
+
+class ChunkListTest(unittest.TestCase):
+
+    def test_more_chunks_than_items(self):
+
+        self.assertEqual(list(chunk_list([1, 2, 3], 8)), [[1], [2], [3]])
+
+    def test_as_many_chunks_as_items(self):
+
+        self.assertEqual(list(chunk_list([1, 2, 3], 3)), [[1], [2], [3]])
+
+    def test_uneven_split(self):
+
+        chunks = list(chunk_list(list(range(10)), 3))
+
+        self.assertEqual(chunks, [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]])
+
+    def test_empty_list(self):
+
+        self.assertEqual(list(chunk_list([], 4)), [])
+
+    def test_non_positive_chunk_count(self):
+
+        for n in (0, -1, -4):
+            with self.assertRaises(ValueError):
+                chunk_list(list(range(10)), n)
+
+
+if __name__ == "__main__":
+    unittest.main()